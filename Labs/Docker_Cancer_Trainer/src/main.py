@@ -5,8 +5,10 @@ from sklearn.metrics import accuracy_score, classification_report, confusion_mat
 import joblib
 from pathlib import Path
 import json
-import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib
+
+matplotlib.use("Agg")  # headless container: skip GUI backend probing
+import matplotlib.pyplot as plt  # noqa: E402
 
 if __name__ == "__main__":
     # Load data
@@ -21,7 +23,15 @@ if __name__ == "__main__":
     )
 
     # Train
-    model = RandomForestClassifier(n_estimators=200, random_state=42)
+    model = RandomForestClassifier(
+        n_estimators=200,
+        max_depth=16,
+        min_samples_leaf=2,
+        max_features="sqrt",
+        max_samples=0.8,
+        n_jobs=-1,
+        random_state=42,
+    )
     model.fit(X_train, y_train)
 
     # Evaluate
@@ -35,7 +45,7 @@ if __name__ == "__main__":
     artifacts_dir.mkdir(parents=True, exist_ok=True)
 
     # Save model
-    joblib.dump(model, artifacts_dir / "cancer_model.pkl")
+    joblib.dump(model, artifacts_dir / "cancer_model.pkl", compress=3, protocol=5)
 
     # Save metrics JSON + pretty text
     (artifacts_dir / "metrics.json").write_text(json.dumps({
@@ -45,21 +55,22 @@ if __name__ == "__main__":
 
     with open(artifacts_dir / "metrics.txt", "w") as f:
         f.write(f"Accuracy: {acc:.4f}\n\n")
-        f.write(pd.DataFrame(report).to_string())
+        f.write(classification_report(y_test, y_pred, target_names=target_names))
 
     # Save confusion matrix as PNG
-    fig = plt.figure()
-    df_cm = pd.DataFrame(cm, index=target_names, columns=target_names)
-    plt.imshow(cm, interpolation="nearest")
-    plt.title("Confusion Matrix")
-    plt.colorbar()
+    fig, ax = plt.subplots()
+    im = ax.imshow(cm, interpolation="nearest")
+    ax.set_title("Confusion Matrix")
+    fig.colorbar(im, ax=ax)
     tick_marks = range(len(target_names))
-    plt.xticks(tick_marks, target_names, rotation=45)
-    plt.yticks(tick_marks, target_names)
-    plt.xlabel("Predicted")
-    plt.ylabel("True")
-    plt.tight_layout()
-    plt.savefig(artifacts_dir / "confusion_matrix.png")
+    ax.set_xticks(tick_marks)
+    ax.set_xticklabels(target_names, rotation=45)
+    ax.set_yticks(tick_marks)
+    ax.set_yticklabels(target_names)
+    ax.set_xlabel("Predicted")
+    ax.set_ylabel("True")
+    fig.tight_layout()
+    fig.savefig(artifacts_dir / "confusion_matrix.png")
     plt.close(fig)
 
     print("✅ Trained RandomForest on Breast Cancer dataset")
@@ -1,25 +1,42 @@
 import re
 from collections import Counter
 
+_WS = re.compile(r"\s+")
+# same tokens as r"\b\w+'\w+|\b\w+\b" (words, optionally with one inner
+# apostrophe), without the alternation and word-boundary backtracking
+_TOKEN = re.compile(r"\w+(?:'\w+)?")
+# every byte except ASCII a-z / 0-9, for bytes.translate(None, delete=...)
+_NONALNUM_BYTES = bytes(
+    c
+    for c in range(256)
+    if not (ord("a") <= c <= ord("z") or ord("0") <= c <= ord("9"))
+)
+
 
 def normalize(text: str) -> str:
-    return re.sub(r"\s+", " ", text.strip().lower())
+    return _WS.sub(" ", text.strip().lower())
+
+
+def _tokenize(text: str) -> list:
+    # tokens never contain whitespace, so normalize()'s collapsing is not needed
+    return _TOKEN.findall(text.lower())
 
 
 def word_count(text: str) -> int:
-    tokens = re.findall(r"\b\w+'\w+|\b\w+\b", normalize(text))
-    return len(tokens)
+    return len(_tokenize(text))
 
 
 def char_count(text: str) -> int:
-    return len(re.sub(r"\s+", "", text))
+    return len(_WS.sub("", text))
 
 
 def is_palindrome(text: str) -> bool:
-    s = re.sub(r"[^a-z0-9]", "", text.lower())
-    return s == s[::-1]
+    # non-ASCII never matched [a-z0-9], so dropping it on encode is equivalent
+    b = text.lower().encode("ascii", "ignore").translate(None, delete=_NONALNUM_BYTES)
+    return b == b[::-1]
 
 
 def most_common_word(text: str):
-    tokens = re.findall(r"\b\w+'\w+|\b\w+\b", normalize(text))
-    return Counter(tokens).most_common(1)[0][0] if tokens else None
+    counts = Counter(_tokenize(text))
+    # max() keeps the first-seen word on ties, like most_common(1), minus the heap
+    return max(counts, key=counts.__getitem__) if counts else None
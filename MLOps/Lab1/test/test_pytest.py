@@ -13,6 +13,7 @@ def test_normalize():
 
 def test_word_count():
     assert word_count("one  two three") == 3
+    assert word_count("don't 'quote' rock'n'roll") == 4
 
 
 def test_char_count():
@@ -27,3 +28,5 @@ def test_is_palindrome():
 def test_most_common_word():
     txt = "Red fish, blue fish. Red RED!"
     assert most_common_word(txt) == "red"
+    # ties go to the word seen first
+    assert most_common_word("b a a b") == "b"
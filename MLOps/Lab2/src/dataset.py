@@ -0,0 +1,36 @@
+import hashlib
+import os
+
+import numpy as np
+import sklearn
+from sklearn.datasets import make_classification
+
+# Shared by train_model.py and evaluate_model.py so both see identical data
+CACHE_DIR = "MLOps/Lab2/cache"
+
+SYNTHETIC_PARAMS = {
+    "n_samples": 500,
+    "n_features": 10,
+    "n_informative": 5,
+    "n_redundant": 2,
+    "random_state": 42,
+}
+
+
+def load_synthetic():
+    """Return the synthetic (X, y), cached as .npz after the first call.
+
+    The cache file name hashes the generator params and the scikit-learn
+    version, so changing either builds a fresh file instead of reusing stale
+    arrays.
+    """
+    key = repr((sorted(SYNTHETIC_PARAMS.items()), sklearn.__version__))
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    path = os.path.join(CACHE_DIR, f"synthetic_{digest}.npz")
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return cached["X"], cached["y"]
+    X, y = make_classification(**SYNTHETIC_PARAMS)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.savez(path, X=X, y=y)
+    return X, y
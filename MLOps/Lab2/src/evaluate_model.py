@@ -2,19 +2,14 @@ import os
 from datetime import datetime
 
 import joblib
-from sklearn.datasets import make_classification
 from sklearn.metrics import f1_score
 
+from dataset import load_synthetic
+
 
 def main() -> None:
-    # Recreate synthetic test data
-    X, y = make_classification(
-        n_samples=500,
-        n_features=10,
-        n_informative=5,
-        n_redundant=2,
-        random_state=42,
-    )
+    # Reuse the synthetic data cached by train_model.py
+    X, y = load_synthetic()
     Xte, yte = X[:100], y[:100]
 
     # Load latest model
@@ -23,7 +18,7 @@ def main() -> None:
         raise FileNotFoundError("No models found. Run train_model.py first.")
     latest = sorted(os.listdir(model_dir))[-1]
     model_path = os.path.join(model_dir, latest)
-    clf = joblib.load(model_path)
+    clf = joblib.load(model_path, mmap_mode="r")
 
     # Evaluate and save metric
     f1 = f1_score(yte, clf.predict(Xte))
@@ -2,40 +2,38 @@ import os
 from datetime import datetime
 
 import joblib
-import pandas as pd
-from sklearn.datasets import make_classification
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 
+from dataset import load_synthetic
+
 
 def main() -> None:
-    # Generate synthetic data
-    X, y = make_classification(
-        n_samples=500,
-        n_features=10,
-        n_informative=5,
-        n_redundant=2,
-        random_state=42,
-    )
-    df = pd.DataFrame(
-        X,
-        columns=[f"feature_{i}" for i in range(10)],
-    )
-    df["target"] = y
+    # Generate synthetic data (cached after the first run)
+    X, y = load_synthetic()
 
-    # Train split
-    train = df.sample(frac=0.8, random_state=42)
-    Xtr = train.drop(columns=["target"])
-    ytr = train["target"]
+    # Train split (80% sample, no DataFrame round-trip)
+    rng = np.random.default_rng(42)
+    idx = rng.choice(len(X), size=int(0.8 * len(X)), replace=False)
 
     # Train model
-    clf = RandomForestClassifier(random_state=42)
-    clf.fit(Xtr, ytr)
+    clf = RandomForestClassifier(
+        n_estimators=100,
+        max_depth=16,
+        min_samples_leaf=2,
+        max_features="sqrt",
+        max_samples=0.8,
+        n_jobs=-1,
+        random_state=42,
+    )
+    clf.fit(X[idx], y[idx])
 
     # Save model with timestamp
     os.makedirs("MLOps/Lab2/models", exist_ok=True)
     ts = datetime.now().strftime("%Y%m%d%H%M%S")
     path = f"MLOps/Lab2/models/model_{ts}.joblib"
-    joblib.dump(clf, path)
+    # Uncompressed so evaluate_model.py can memory-map the tree arrays
+    joblib.dump(clf, path, protocol=5)
     print(f"✅ Saved: {path}")
 
 
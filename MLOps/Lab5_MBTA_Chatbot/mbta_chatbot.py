@@ -7,32 +7,53 @@
 from fastapi import FastAPI
 from fastapi.responses import HTMLResponse, JSONResponse
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from typing import Optional
-import requests
-
-app = FastAPI()
+import asyncio
+import re
+import httpx
 
 MBTA_BASE_URL = "https://api-v3.mbta.com"
 MBTA_API_KEY: Optional[str] = None  # Optional – leave None for low usage
 
+# One pooled keep-alive client, so only the first call pays the TLS handshake
+_ACLIENT = httpx.AsyncClient(
+    base_url=MBTA_BASE_URL,
+    headers={"x-api-key": MBTA_API_KEY} if MBTA_API_KEY else None,
+    timeout=10,
+    transport=httpx.AsyncHTTPTransport(
+        retries=2,
+        limits=httpx.Limits(max_connections=20),
+    ),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await _ACLIENT.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Stop and route names are effectively static, so remember them per process.
+# (functools.lru_cache would cache the coroutine object, not its result.)
+_STOP_NAME_CACHE: dict[str, str] = {}
+_ROUTE_NAME_CACHE: dict[str, str] = {}
+
+# Chat intent keywords, matched as substrings (so "trains" / "arriving" count)
+_NEU_RE = re.compile(r"northeastern|neu|here|this station")
+_TRAIN_RE = re.compile(r"train|next|when|where|coming|arrive")
+
 
 class ChatRequest(BaseModel):
     message: str
 
 
-def mbta_get(path: str, params=None):
+async def mbta_get(path: str, params=None):
     """Helper to call MBTA API."""
-    headers = {}
-    if MBTA_API_KEY:
-        headers["x-api-key"] = MBTA_API_KEY
-
-    resp = requests.get(
-        f"{MBTA_BASE_URL}{path}",
-        params=params or {},
-        headers=headers,
-        timeout=10,
-    )
+    resp = await _ACLIENT.get(path, params=params or {})
     resp.raise_for_status()
     return resp.json()
 
@@ -62,7 +83,18 @@ def minutes_until(iso_str: Optional[str]) -> Optional[int]:
         return None
 
 
-def get_previous_stop_for_trip(trip_id: str) -> Optional[str]:
+async def _stop_name(stop_id: str) -> Optional[str]:
+    """Resolve a stop_id to its human-readable name via /stops/{stop_id}."""
+    name = _STOP_NAME_CACHE.get(stop_id)
+    if name is None:
+        stop_info = await mbta_get(f"/stops/{stop_id}")
+        name = stop_info.get("data", {}).get("attributes", {}).get("name")
+        if name:
+            _STOP_NAME_CACHE[stop_id] = name
+    return name
+
+
+async def get_previous_stop_for_trip(trip_id: str) -> Optional[str]:
     """
     Try to infer the last known stop for a vehicle on a given trip.
 
@@ -70,12 +102,12 @@ def get_previous_stop_for_trip(trip_id: str) -> Optional[str]:
     - Call /vehicles?filter[trip]=<trip_id>
     - Take the first vehicle
     - Read its stop relationship
-    - Use /stops/{stop_id} to get the human-readable stop name
+    - Use /stops/{stop_id} (cached) to get the human-readable stop name
 
     This is a best-effort approximation; if anything fails, we return None.
     """
     try:
-        data = mbta_get("/vehicles", params={"filter[trip]": trip_id, "page[limit]": 1})
+        data = await mbta_get("/vehicles", params={"filter[trip]": trip_id, "page[limit]": 1})
         vehicles = data.get("data", [])
         if not vehicles:
             return None
@@ -89,19 +121,17 @@ def get_previous_stop_for_trip(trip_id: str) -> Optional[str]:
         if not stop_id:
             return None
 
-        stop_info = mbta_get(f"/stops/{stop_id}")
-        name = stop_info.get("data", {}).get("attributes", {}).get("name")
-        return name
+        return await _stop_name(stop_id)
     except Exception:
         return None
 
 
-def get_next_trains_northeastern() -> str:
+async def get_next_trains_northeastern() -> str:
     """Fetch live predictions for Northeastern University station (place-nuniv)."""
     stop_id = "place-nuniv"
     readable_name = "Northeastern University Station"
 
-    data = mbta_get(
+    data = await mbta_get(
         "/predictions",
         params={
             "filter[stop]": stop_id,
@@ -117,7 +147,7 @@ def get_next_trains_northeastern() -> str:
 
     # Build lookup for route names
     included = data.get("included", []) or []
-    route_names = {}
+    route_names = _ROUTE_NAME_CACHE
     for item in included:
         if item.get("type") == "route":
             rid = item.get("id")
@@ -128,29 +158,38 @@ def get_next_trains_northeastern() -> str:
                 or rid
             )
 
+    shown = predictions[:3]  # just first 3
+
+    # ---- NEW LOGIC FOR STATUS ----
+    # Predictions without a status get "Left <previous stop>"; the lookups
+    # are independent, so run them concurrently.
+    async def previous_stop(p) -> Optional[str]:
+        raw_status = p.get("attributes", {}).get("status")
+        if raw_status and raw_status != "No status":
+            return None
+        trip_id = (
+            p.get("relationships", {})
+             .get("trip", {})
+             .get("data", {})
+             .get("id")
+        )
+        return await get_previous_stop_for_trip(trip_id) if trip_id else None
+
+    prev_stops = await asyncio.gather(*(previous_stop(p) for p in shown))
+    # -------------------------------
+
     lines: list[str] = []
-    for p in predictions[:3]:  # just first 3
+    for p, prev_stop in zip(shown, prev_stops):
         attr = p.get("attributes", {})
         dep = attr.get("departure_time") or attr.get("arrival_time")
 
-        # ---- NEW LOGIC FOR STATUS ----
         raw_status = attr.get("status")
         if raw_status and raw_status != "No status":
             status_text = raw_status
+        elif prev_stop:
+            status_text = f"Left {prev_stop}"
         else:
-            # try to say "Left <previous stop>"
-            trip_id = (
-                p.get("relationships", {})
-                 .get("trip", {})
-                 .get("data", {})
-                 .get("id")
-            )
-            prev_stop = get_previous_stop_for_trip(trip_id) if trip_id else None
-            if prev_stop:
-                status_text = f"Left {prev_stop}"
-            else:
-                status_text = "No status"
-        # -------------------------------
+            status_text = "No status"
 
         # Route
         rel = p.get("relationships", {})
@@ -187,26 +226,18 @@ def get_next_trains_northeastern() -> str:
     return header + "\n" + "\n".join(lines)
 
 
-def handle_chat_message(text: str) -> str:
+async def handle_chat_message(text: str) -> str:
     """Very simple chatbot logic."""
     t = text.lower()
 
     # If user mentions Northeastern / here / this station, assume place-nuniv
-    is_northeastern = (
-        "northeastern" in t
-        or "neu" in t
-        or "here" in t
-        or "this station" in t
-    )
+    is_northeastern = _NEU_RE.search(t) is not None
 
-    asks_train = any(
-        word in t
-        for word in ["train", "next", "when", "where", "coming", "arrive"]
-    )
+    asks_train = _TRAIN_RE.search(t) is not None
 
     if is_northeastern and asks_train:
         try:
-            return get_next_trains_northeastern()
+            return await get_next_trains_northeastern()
         except Exception as e:
             return (
                 "I tried to look up the live trains for Northeastern, "
@@ -232,10 +263,7 @@ def handle_chat_message(text: str) -> str:
     )
 
 
-@app.get("/", response_class=HTMLResponse)
-def index():
-    """Serve a simple chat UI."""
-    html = """
+_INDEX_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -422,13 +450,21 @@ def index():
     </body>
     </html>
     """
-    return HTMLResponse(content=html)
+
+# The page is static: render the response once and serve the same object
+_INDEX_RESPONSE = HTMLResponse(content=_INDEX_HTML)
+
+
+@app.get("/", response_class=HTMLResponse)
+async def index():
+    """Serve a simple chat UI."""
+    return _INDEX_RESPONSE
 
 
 @app.post("/chat")
-def chat(req: ChatRequest):
+async def chat(req: ChatRequest):
     """Chat endpoint: takes user text, returns bot reply."""
-    reply = handle_chat_message(req.message)
+    reply = await handle_chat_message(req.message)
     return JSONResponse({"reply": reply})
 
 
@@ -2,7 +2,7 @@
 Lab 3 – Feature Selection
 
 Dataset:
-    data/breast_cancer_lab3.csv
+    data/breast_cancer_lab3.parquet (or .h5 / .csv, see load_data)
     - 30 numeric features
     - target column: "target" (0/1)
 
@@ -13,6 +13,9 @@ This script:
     * compares performance (Accuracy, ROC, Precision, Recall, F1)
 """
 
+import argparse
+import sys
+
 import numpy as np
 import pandas as pd
 import seaborn as sns
@@ -20,6 +23,8 @@ import matplotlib.pyplot as plt
 
 from pathlib import Path
 
+from joblib import Parallel, delayed
+
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.feature_selection import (
     RFE,
@@ -42,7 +47,7 @@ from sklearn.metrics import (
 # CONFIG
 # ==========================
 
-DATASET_PATH = Path("data") / "breast_cancer_lab3.csv"
+DATASET_PATH = Path("data") / "breast_cancer_lab3.parquet"
 TARGET_COL = "target"
 
 TEST_SIZE = 0.2
@@ -53,30 +58,76 @@ CORR_TARGET_THRESHOLD = 0.2
 CORR_FEATURE_THRESHOLD = 0.9
 FEATURE_IMPORTANCE_THRESHOLD = 0.013
 
+# Open plot windows only on an interactive terminal; otherwise (or with
+# --no-plot) figures are written to FIG_DIR as PNGs.
+SHOW_PLOTS = sys.stdout.isatty()
+FIG_DIR = Path("figures")
+
+RESULT_COLUMNS = ["Accuracy", "ROC", "Precision", "Recall", "F1 Score", "Feature Count"]
+
 
 # ==========================
 # HELPERS
 # ==========================
 
+def read_dataset(path):
+    """Read the Parquet dataset, falling back to the HDF5 or CSV export."""
+    if path.exists():
+        return path, pd.read_parquet(path)
+    if path.with_suffix(".h5").exists():
+        path = path.with_suffix(".h5")
+        return path, pd.read_hdf(path, key="data")
+    path = path.with_suffix(".csv")
+    return path, pd.read_csv(path)
+
+
 def load_data():
-    """Load the CSV and split into X, y."""
-    print(f"Loading dataset from {DATASET_PATH} ...")
-    df = pd.read_csv(DATASET_PATH)
+    """Load the dataset and split into X, y."""
+    path, df = read_dataset(DATASET_PATH)
+    print(f"Loaded dataset from {path}")
     print("Shape:", df.shape)
     print("Columns:", df.columns.tolist())
 
     if TARGET_COL not in df.columns:
-        raise ValueError(f"Target column '{TARGET_COL}' not found in CSV.")
+        raise ValueError(f"Target column '{TARGET_COL}' not found in {path.name}.")
 
     X = df.drop(columns=[TARGET_COL])
     y = df[TARGET_COL].values
     return df, X, y
 
 
-def fit_model(X_train, y_train):
-    model = RandomForestClassifier(
-        criterion="entropy", random_state=47, n_estimators=200
+def prepare_splits(X, y):
+    """Split and scale once; selectors share the float32 train/test arrays."""
+    X_train, X_test, y_train, y_test = train_test_split(
+        X.values,
+        y,
+        test_size=TEST_SIZE,
+        stratify=y,
+        random_state=RANDOM_STATE,
+    )
+
+    scaler = StandardScaler().fit(X_train)
+    X_train_scaled = np.ascontiguousarray(scaler.transform(X_train), dtype=np.float32)
+    X_test_scaled = np.ascontiguousarray(scaler.transform(X_test), dtype=np.float32)
+    return X_train_scaled, X_test_scaled, y_train, y_test, X.columns
+
+
+def make_forest(n_jobs=-1):
+    """RandomForest used for evaluation and RFE, with explicit tree-size limits."""
+    return RandomForestClassifier(
+        criterion="entropy",
+        random_state=47,
+        n_estimators=200,
+        max_depth=16,
+        min_samples_leaf=2,
+        max_features="sqrt",
+        max_samples=0.8,
+        n_jobs=n_jobs,
     )
+
+
+def fit_model(X_train, y_train, n_jobs=-1):
+    model = make_forest(n_jobs=n_jobs)
     model.fit(X_train, y_train)
     return model
 
@@ -93,45 +144,69 @@ def calculate_metrics(model, X_test, y_test):
     return acc, roc, prec, rec, f1
 
 
-def train_and_get_metrics(X, y):
-    X_train, X_test, y_train, y_test = train_test_split(
-        X,
-        y,
-        test_size=TEST_SIZE,
-        stratify=y,
-        random_state=RANDOM_STATE,
-    )
+# Forests fitted on the shared training split, keyed by sorted column indices.
+# Selectors that produce the same subset (or the full set) reuse one fit.
+_FITTED_MODELS = {}
 
-    scaler = StandardScaler().fit(X_train)
-    X_train_scaled = scaler.transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
 
-    model = fit_model(X_train_scaled, y_train)
-    return calculate_metrics(model, X_test_scaled, y_test)
+def feature_key(feature_idx):
+    return tuple(sorted(int(i) for i in feature_idx))
 
 
-def evaluate_model_on_features(X, y, label):
-    acc, roc, prec, rec, f1 = train_and_get_metrics(X, y)
-    return pd.DataFrame(
-        [[acc, roc, prec, rec, f1, X.shape[1]]],
-        columns=["Accuracy", "ROC", "Precision", "Recall", "F1 Score", "Feature Count"],
-        index=[label],
+def fit_model_on_features(X_train, y_train, key):
+    model = _FITTED_MODELS.get(key)
+    if model is None:
+        model = _FITTED_MODELS[key] = fit_model(X_train[:, list(key)], y_train)
+    return model
+
+
+def fit_models_in_parallel(X_train, y_train, keys):
+    """Fit the forests missing from the registry, one worker process per subset."""
+    missing = [key for key in dict.fromkeys(keys) if key not in _FITTED_MODELS]
+    # single-threaded forests so the concurrent fits don't oversubscribe cores
+    models = Parallel(n_jobs=-1, prefer="processes")(
+        delayed(fit_model)(X_train[:, list(key)], y_train, n_jobs=1) for key in missing
     )
+    _FITTED_MODELS.update(zip(missing, models))
+
+
+def evaluate_model_on_features(splits, feature_idx, label):
+    """Return one results row: (label, *metrics, feature count)."""
+    X_train, X_test, y_train, y_test = splits
+    key = feature_key(feature_idx)
+    model = fit_model_on_features(X_train, y_train, key)
+    metrics = calculate_metrics(model, X_test[:, list(key)], y_test)
+    return (label, *metrics, len(key))
+
+
+def finish_plot(name):
+    """Show the current figure, or save it under FIG_DIR when running headless."""
+    if SHOW_PLOTS:
+        plt.show()
+    else:
+        FIG_DIR.mkdir(parents=True, exist_ok=True)
+        plt.savefig(FIG_DIR / f"{name}.png")
+    plt.close()
 
 
 # ==========================
 # FEATURE SELECTION METHODS
 # ==========================
 
-def strong_corr_features(df):
+def correlation_matrix(df):
+    """Pearson correlation of all columns (features + target), computed once."""
+    corr = np.corrcoef(df.values, rowvar=False)
+    return pd.DataFrame(corr, index=df.columns, columns=df.columns)
+
+
+def strong_corr_features(cor):
     """Filter features strongly correlated with the target."""
     print("\n[1] Filter: correlation with target")
-    cor = df.corr()
     plt.figure(figsize=(12, 10))
     sns.heatmap(cor, cmap="PuBu", annot=False)
     plt.title("Correlation matrix")
     plt.tight_layout()
-    plt.show()
+    finish_plot("correlation_matrix")
 
     cor_target = cor[TARGET_COL].abs()
     relevant = cor_target[cor_target > CORR_TARGET_THRESHOLD]
@@ -141,82 +216,49 @@ def strong_corr_features(df):
     return names
 
 
-def drop_redundant_features(X):
+def drop_redundant_features(cor):
     """Drop highly correlated (redundant) features."""
     print("\n[2] Filter: drop redundant highly correlated features")
-    corr_matrix = X.corr().abs()
-    upper = corr_matrix.where(
-        np.triu(np.ones(corr_matrix.shape), k=1).astype(bool)
-    )
-    to_drop = [col for col in upper.columns if any(upper[col] > CORR_FEATURE_THRESHOLD)]
-    kept = [c for c in X.columns if c not in to_drop]
+    corr = np.abs(cor.values)
+    # a column is redundant if it correlates strongly with any earlier column
+    upper = np.triu(corr > CORR_FEATURE_THRESHOLD, k=1)
+    drop_mask = upper.any(axis=0)
+    to_drop = cor.columns[drop_mask].tolist()
+    kept = cor.columns[~drop_mask].tolist()
 
     print("Features dropped:", to_drop)
     print("Remaining features:", len(kept))
     return kept
 
 
-def univariate_kbest(X, y):
+def univariate_kbest(X_train, y_train, columns):
     """SelectKBest with ANOVA F-test."""
     print("\n[3] Filter: Univariate F-test (SelectKBest)")
-    X_train, _, y_train, _ = train_test_split(
-        X,
-        y,
-        test_size=TEST_SIZE,
-        stratify=y,
-        random_state=RANDOM_STATE,
-    )
-    scaler = StandardScaler().fit(X_train)
-    X_train_scaled = scaler.transform(X_train)
-
-    k = min(K_UNIVARIATE, X.shape[1])
+    k = min(K_UNIVARIATE, X_train.shape[1])
     selector = SelectKBest(f_classif, k=k)
-    selector.fit(X_train_scaled, y_train)
-    names = X.columns[selector.get_support()]
+    selector.fit(X_train, y_train)
+    names = columns[selector.get_support()]
     print(f"Selected {len(names)} features by F-test.")
     return list(names)
 
 
-def rfe_selection(X, y):
+def rfe_selection(X_train, y_train, columns):
     """Recursive Feature Elimination with RandomForest."""
     print("\n[4] Wrapper: RFE with RandomForest")
-    X_train, _, y_train, _ = train_test_split(
-        X,
-        y,
-        test_size=TEST_SIZE,
-        stratify=y,
-        random_state=RANDOM_STATE,
-    )
-    scaler = StandardScaler().fit(X_train)
-    X_train_scaled = scaler.transform(X_train)
-
-    n_features = min(N_RFE_FEATURES, X.shape[1])
-    model = RandomForestClassifier(
-        criterion="entropy", random_state=47, n_estimators=200
-    )
-    rfe = RFE(model, n_features_to_select=n_features)
-    rfe.fit(X_train_scaled, y_train)
-    names = X.columns[rfe.get_support()]
+    n_features = min(N_RFE_FEATURES, X_train.shape[1])
+    rfe = RFE(make_forest(), n_features_to_select=n_features)
+    rfe.fit(X_train, y_train)
+    names = columns[rfe.get_support()]
     print(f"Selected {len(names)} features via RFE.")
     return list(names)
 
 
-def feature_importance_selection(X, y):
+def feature_importance_selection(X_train, y_train, columns):
     """Embedded: RandomForest feature importance + SelectFromModel."""
     print("\n[5] Embedded: Feature importance (RandomForest)")
-    X_train, _, y_train, _ = train_test_split(
-        X,
-        y,
-        test_size=TEST_SIZE,
-        stratify=y,
-        random_state=RANDOM_STATE,
-    )
-    scaler = StandardScaler().fit(X_train)
-    X_train_scaled = scaler.transform(X_train)
-
-    model = RandomForestClassifier(random_state=RANDOM_STATE, n_estimators=200)
-    model.fit(X_train_scaled, y_train)
-    importances = pd.Series(model.feature_importances_, index=X.columns).sort_values(
+    # same forest as the "All features" baseline, which then reuses this fit
+    model = fit_model_on_features(X_train, y_train, feature_key(range(X_train.shape[1])))
+    importances = pd.Series(model.feature_importances_, index=columns).sort_values(
         ascending=True
     )
 
@@ -224,32 +266,22 @@ def feature_importance_selection(X, y):
     importances.plot(kind="barh")
     plt.title("Feature importances (RandomForest)")
     plt.tight_layout()
-    plt.show()
+    finish_plot("feature_importances")
 
     selector = SelectFromModel(model, prefit=True, threshold=FEATURE_IMPORTANCE_THRESHOLD)
-    names = X.columns[selector.get_support()]
+    names = columns[selector.get_support()]
     print(f"Selected {len(names)} features via feature importance.")
     return list(names)
 
 
-def l1_selection(X, y):
+def l1_selection(X_train, y_train, columns):
     """Embedded: L1-regularized LinearSVC."""
     print("\n[6] Embedded: L1-regularized LinearSVC")
-    X_train, _, y_train, _ = train_test_split(
-        X,
-        y,
-        test_size=TEST_SIZE,
-        stratify=y,
-        random_state=RANDOM_STATE,
-    )
-    scaler = StandardScaler().fit(X_train)
-    X_train_scaled = scaler.transform(X_train)
-
     lsvc = LinearSVC(C=1.0, penalty="l1", dual=False, random_state=RANDOM_STATE)
     selector = SelectFromModel(lsvc)
-    selector.fit(X_train_scaled, y_train)
+    selector.fit(X_train, y_train)
 
-    names = X.columns[selector.get_support()]
+    names = columns[selector.get_support()]
     print(f"Selected {len(names)} features via L1 regularization.")
     return list(names)
 
@@ -258,49 +290,80 @@ def l1_selection(X, y):
 # MAIN
 # ==========================
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Lab 3 – feature selection")
+    parser.add_argument(
+        "--no-plot",
+        action="store_true",
+        default=not sys.stdout.isatty(),
+        help=f"save figures to {FIG_DIR}/ instead of showing them "
+        "(default when stdout is not a terminal)",
+    )
+    return parser.parse_args()
+
+
 def main():
+    global SHOW_PLOTS
+
+    args = parse_args()
+    SHOW_PLOTS = not args.no_plot
+    if not SHOW_PLOTS:
+        # headless: render straight to PNG without touching a GUI toolkit
+        plt.switch_backend("Agg")
+
     df, X, y = load_data()
+    X_train, X_test, y_train, y_test, columns = prepare_splits(X, y)
+    splits = (X_train, X_test, y_train, y_test)
 
-    # start with an empty DataFrame
-    results = pd.DataFrame()
+    # (label, column indices) pairs, evaluated after all selectors ran
+    subsets = []
 
     # 0) Baseline – all features
     print("\n=== Baseline: all features ===")
-    results = pd.concat([results, evaluate_model_on_features(X, y, "All features")])
+    subsets.append(("All features", np.arange(len(columns))))
 
     # 1) Strongly correlated features
-    strong_names = strong_corr_features(df)
-    X_strong = X[strong_names]
-    results = pd.concat([results, evaluate_model_on_features(X_strong, y, "Strong corr")])
+    corr = correlation_matrix(df)
+    strong_names = strong_corr_features(corr)
+    subsets.append(("Strong corr", columns.get_indexer(strong_names)))
 
     # 2) Subset after dropping redundant features
-    subset_names = drop_redundant_features(X_strong)
-    X_subset = X[subset_names]
-    results = pd.concat([results, evaluate_model_on_features(X_subset, y, "Subset corr")])
+    subset_names = drop_redundant_features(corr.loc[strong_names, strong_names])
+    subsets.append(("Subset corr", columns.get_indexer(subset_names)))
 
     # 3) Univariate F-test
-    uni_names = univariate_kbest(X, y)
-    X_uni = X[uni_names]
-    results = pd.concat([results, evaluate_model_on_features(X_uni, y, "F-test")])
+    uni_names = univariate_kbest(X_train, y_train, columns)
+    subsets.append(("F-test", columns.get_indexer(uni_names)))
 
     # 4) RFE
-    rfe_names = rfe_selection(X, y)
-    X_rfe = X[rfe_names]
-    results = pd.concat([results, evaluate_model_on_features(X_rfe, y, "RFE")])
+    rfe_names = rfe_selection(X_train, y_train, columns)
+    subsets.append(("RFE", columns.get_indexer(rfe_names)))
 
     # 5) Feature importance
-    fi_names = feature_importance_selection(X, y)
-    X_fi = X[fi_names]
-    results = pd.concat([results, evaluate_model_on_features(X_fi, y, "Feat importance")])
+    fi_names = feature_importance_selection(X_train, y_train, columns)
+    subsets.append(("Feat importance", columns.get_indexer(fi_names)))
 
     # 6) L1 regularization
-    l1_names = l1_selection(X, y)
+    l1_names = l1_selection(X_train, y_train, columns)
     if len(l1_names) > 0:
-        X_l1 = X[l1_names]
-        results = pd.concat([results, evaluate_model_on_features(X_l1, y, "L1 Reg")])
+        subsets.append(("L1 Reg", columns.get_indexer(l1_names)))
     else:
         print("No features selected by L1; skipping metrics for L1.")
 
+    # Train every distinct subset's forest concurrently, then score them
+    fit_models_in_parallel(
+        X_train, y_train, [feature_key(feature_idx) for _, feature_idx in subsets]
+    )
+    rows = [
+        evaluate_model_on_features(splits, feature_idx, label)
+        for label, feature_idx in subsets
+    ]
+
+    results = pd.DataFrame.from_records(
+        rows, columns=["Method", *RESULT_COLUMNS], index="Method"
+    )
+    results.index.name = None
+
     # Final summary
     print("\n==============================")
     print("FINAL RESULTS")
@@ -10,9 +10,14 @@ def main():
     # target: 0 = malignant? No: in sklearn, 0 = malignant, 1 = benign
     df["target"] = data.target
 
-    out_path = Path("data") / "breast_cancer_lab3.csv"
+    out_path = Path("data") / "breast_cancer_lab3.parquet"
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(out_path, index=False)
+    try:
+        df.to_parquet(out_path, index=False)
+    except ImportError:
+        # no parquet engine (pyarrow) installed; HDF5 is the binary fallback
+        out_path = out_path.with_suffix(".h5")
+        df.to_hdf(out_path, key="data", format="table", complib="blosc")
 
     print(f"Saved dataset to {out_path} with shape {df.shape}")
 